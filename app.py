@@ -1,13 +1,33 @@
 import os
 from flask import Flask, jsonify, request
+from flask.json.provider import JSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from flask_caching import Cache
+from sqlalchemy import delete, event, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload
 from datetime import datetime
-import json
+import msgspec
+import orjson
+import queue
+import threading
 
 
 
+#  orjson encodes ~3-5x faster than the stdlib json module and handles
+#  datetimes natively, so jsonify gets cheaper across every endpoint
+class OrjsonProvider(JSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # Enable frontend-backend communication
 
 # Dynamically locate the database in the same directory as app.py
@@ -15,8 +35,47 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 DATABASE_PATH = os.path.join(BASE_DIR, "store.db")
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DATABASE_PATH}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Bounded connection pool so concurrent request threads each get their own
+# connection instead of serializing on a single one
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_size": 10, "max_overflow": 20}
+
+# Short-TTL cache in front of the read endpoints; writes invalidate the
+# affected lists so clients never see stale data longer than one write.
+# Redis is only used when a URL is explicitly configured - defaulting to it
+# would 500 every cached GET under the debug server when no Redis is running,
+# since flask-caching re-raises backend errors in debug mode
+app.config["CACHE_TYPE"] = os.environ.get(
+    "CACHE_TYPE", "RedisCache" if "CACHE_REDIS_URL" in os.environ else "SimpleCache")
+app.config["CACHE_REDIS_URL"] = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+app.config["CACHE_DEFAULT_TIMEOUT"] = 30
 
 db = SQLAlchemy(app)
+cache = Cache(app)
+
+
+#  Drop cached list responses after a write; a missing cache backend just
+#  means the entries expire via their TTL instead
+def invalidate_cache(*keys):
+    try:
+        cache.delete_many(*keys)
+    except Exception:
+        pass
+
+
+#  Tune SQLite on every new connection: WAL lets readers and the writer run
+#  concurrently, and synchronous=NORMAL drops the per-commit fsync cost
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")  # SQLite leaves FK enforcement off by default
+    cursor.execute("PRAGMA busy_timeout=5000")  # wait for the write lock instead of failing
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-20000")  # ~20MB page cache
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256MB memory-mapped I/O
+    cursor.close()
+
 
 # Models (Database Tables)
 class Material(db.Model):
@@ -28,13 +87,19 @@ class Material(db.Model):
     supplier = db.Column(db.String(100))
     total_quantity = db.Column(db.Float, default=0)  # Tracks total stock
 
+    # Cover the filter_by lookups in add_material and add_rolls
+    __table_args__ = (
+        db.Index("ix_material_name_type_supplier", "name", "type", "supplier"),
+        db.Index("ix_material_name_type", "name", "type"),
+    )
+
 
 class MaterialRoll(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    material_id = db.Column(db.Integer, db.ForeignKey("material.id"), nullable=False)
+    material_id = db.Column(db.Integer, db.ForeignKey("material.id", ondelete="CASCADE"), nullable=False, index=True)
     quantity = db.Column(db.Float, nullable=False)
-    date_added = db.Column(db.DateTime, default=datetime.utcnow)
-    material = db.relationship("Material", backref=db.backref("rolls", lazy=True))
+    date_added = db.Column(db.DateTime, server_default=db.func.current_timestamp())
+    material = db.relationship("Material", backref=db.backref("rolls", lazy=True, passive_deletes=True))
 
 class Customer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -45,14 +110,16 @@ class Customer(db.Model):
 
 class Sale(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    material_id = db.Column(db.Integer, db.ForeignKey("material.id"), nullable=False)
-    customer_id = db.Column(db.Integer, db.ForeignKey("customer.id"), nullable=True)
+    material_id = db.Column(db.Integer, db.ForeignKey("material.id", ondelete="CASCADE"), nullable=False, index=True)
+    # SET NULL keeps the sale when its customer is deleted; get_sales renders
+    # a NULL customer as "Walk-in Customer"
+    customer_id = db.Column(db.Integer, db.ForeignKey("customer.id", ondelete="SET NULL"), nullable=True, index=True)
     quantity_sold = db.Column(db.Float, nullable=False)
     price = db.Column(db.Float, nullable=False)
-    date = db.Column(db.DateTime, default=datetime.utcnow)
+    date = db.Column(db.DateTime, server_default=db.func.current_timestamp())
 
 
-    material = db.relationship("Material", backref=db.backref("sales", lazy=True))
+    material = db.relationship("Material", backref=db.backref("sales", lazy=True, passive_deletes=True))
     customer = db.relationship("Customer", backref=db.backref("purchases", lazy=True))
 
 class Processing(db.Model):
@@ -72,89 +139,244 @@ class ActivityLog(db.Model):
     table_name = db.Column(db.String(50), nullable=False)  # sales, materials, customers
     record_id = db.Column(db.Integer, nullable=False)  # ID of affected record
     changes = db.Column(db.Text, nullable=False)  # Store changes as JSON
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, server_default=db.func.current_timestamp(), index=True)  # get_logs orders by this
+
+#  Keep material.total_quantity in sync from inside SQLite itself: every code
+#  path that inserts, updates or deletes a sale adjusts stock in the same
+#  transaction with no extra round-trip, and the invariant cannot drift.
+#  The BEFORE INSERT guard makes the stock check atomic with the deduction,
+#  so concurrent sales cannot drive stock negative
+_SALE_STOCK_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS trg_sale_insert_guard BEFORE INSERT ON sale BEGIN
+        SELECT RAISE(ABORT, 'insufficient stock')
+        WHERE (SELECT total_quantity FROM material WHERE id = NEW.material_id) < NEW.quantity_sold;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_sale_insert AFTER INSERT ON sale BEGIN
+        UPDATE material SET total_quantity = total_quantity - NEW.quantity_sold
+        WHERE id = NEW.material_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_sale_delete AFTER DELETE ON sale BEGIN
+        UPDATE material SET total_quantity = total_quantity + OLD.quantity_sold
+        WHERE id = OLD.material_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_sale_update AFTER UPDATE OF quantity_sold ON sale BEGIN
+        UPDATE material SET total_quantity = total_quantity + OLD.quantity_sold - NEW.quantity_sold
+        WHERE id = NEW.material_id;
+    END""",
+]
+
+
+def _ensure_sale_stock_triggers(connection):
+    for ddl in _SALE_STOCK_TRIGGERS:
+        connection.execute(text(ddl))
+
+
+@event.listens_for(Sale.__table__, "after_create")
+def create_sale_stock_triggers(target, connection, **kw):
+    _ensure_sale_stock_triggers(connection)
+
+
+#  after_create only fires when create_all actually creates the sale table,
+#  which never happens for databases that predate the triggers - without this
+#  they would record sales but leave stock untouched. The DDL is IF NOT
+#  EXISTS, so re-running it at import is free
+with app.app_context(), db.engine.begin() as _connection:
+    if _connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='sale'")).first():
+        _ensure_sale_stock_triggers(_connection)
+
+
+#  Compiled once at import so the hot log path skips rebuilding the INSERT
+#  construct on every call
+_log_insert = ActivityLog.__table__.insert()
+
+#  Write-behind queue for activity logs: request threads only enqueue, and a
+#  background thread batches up to _LOG_FLUSH_BATCH rows into one INSERT every
+#  ~_LOG_FLUSH_INTERVAL seconds, so the log fsync cost is amortized across
+#  many requests. Logs trail the business write by at most the flush interval.
+_log_queue = queue.Queue(maxsize=10000)
+_LOG_FLUSH_INTERVAL = 0.25  # seconds
+_LOG_FLUSH_BATCH = 500
+
+
+def _flush_logs_forever():
+    while True:
+        batch = [_log_queue.get()]  # block until there is something to write
+        try:
+            while len(batch) < _LOG_FLUSH_BATCH:
+                batch.append(_log_queue.get(timeout=_LOG_FLUSH_INTERVAL))
+        except queue.Empty:
+            pass
+        try:
+            with app.app_context(), db.engine.begin() as connection:
+                connection.execute(_log_insert, batch)
+        except Exception:
+            app.logger.exception("Failed to flush %d activity log rows", len(batch))
+
+
+threading.Thread(target=_flush_logs_forever, name="activity-log-flusher", daemon=True).start()
+
 
 #  Function to Log Activity
+#  Enqueues the log row for the background flusher; timestamps are captured
+#  here so they reflect the request, not the flush. Handlers call this after
+#  a successful commit, so actions that never happened are never logged
 def log_activity(action_type, table_name, record_id, changes):
-    new_log = ActivityLog(
-        action_type=action_type,
-        table_name=table_name,
-        record_id=record_id,
-        changes=json.dumps(changes, default=str)  # Convert changes to JSON
-    )
-    db.session.add(new_log)
-    db.session.commit()
+    payload = {
+        "action_type": action_type,
+        "table_name": table_name,
+        "record_id": record_id,
+        "changes": orjson.dumps(changes, default=str).decode(),  # Convert changes to JSON
+        "timestamp": datetime.utcnow()
+    }
+    try:
+        _log_queue.put_nowait(payload)
+    except queue.Full:
+        # Queue saturated - write synchronously rather than dropping the log
+        with db.engine.begin() as connection:
+            connection.execute(_log_insert, payload)
+
+
+#  Request schemas: msgspec decodes and validates the JSON body in C, so a
+#  missing or mistyped field becomes a 400 instead of a KeyError 500
+class AddMaterialReq(msgspec.Struct):
+    name: str
+    type: str
+    supplier: str
+    colour: str | None = None
+
+
+class AddRollsReq(msgspec.Struct):
+    name: str
+    type: str
+    quantities: list[float]
+
+
+class UpdateRollReq(msgspec.Struct):
+    quantity: float
+
+
+class AddCustomerReq(msgspec.Struct):
+    name: str
+    contact: str
+
+
+class EditCustomerReq(msgspec.Struct):
+    name: str | None = None
+    contact: str | None = None
+
+
+class AddSaleReq(msgspec.Struct):
+    material_id: int
+    quantity_sold: float
+    price: float
+    customer_id: int | None = None
+    amount_due: float | None = None
+
+
+class EditSaleReq(msgspec.Struct):
+    quantity_sold: float | None = None
+    price: float | None = None
+
+
+@app.errorhandler(msgspec.DecodeError)
+def handle_invalid_request_body(exc):
+    return jsonify({"error": f"Invalid request body: {exc}"}), 400
 
 
 #  API to Add a New Material (One-time setup per material type)
 @app.route("/api/materials", methods=["POST"])
 def add_material():
-    data = request.json
-    existing_material = Material.query.filter_by(name=data["name"], type=data["type"],
-                                                 supplier=data["supplier"]).first()
+    req = msgspec.json.decode(request.get_data(cache=False), type=AddMaterialReq)
+    existing_material = Material.query.filter_by(name=req.name, type=req.type,
+                                                 supplier=req.supplier).first()
 
     if existing_material:
         return jsonify({"message": "Material already exists, use /api/add_rolls instead"}), 400
 
     new_material = Material(
-        name=data["name"],
-        type=data["type"],
-        colour=data.get("colour"),
-        supplier=data["supplier"]
+        name=req.name,
+        type=req.type,
+        colour=req.colour,
+        supplier=req.supplier
     )
 
     db.session.add(new_material)
+    db.session.flush()  # Assign the new id before committing
+    material_id = new_material.id
+
     db.session.commit()
 
-    log_activity("ADD", "materials", new_material.id, data)
+    log_activity("ADD", "materials", material_id, msgspec.to_builtins(req))
+    invalidate_cache("materials_list")
 
-    return jsonify({"message": "Material added successfully!", "material_id": new_material.id}), 201
+    return jsonify({"message": "Material added successfully!", "material_id": material_id}), 201
 
 
 #  API to Add Multiple Rolls for an Existing Material
 @app.route("/api/add_rolls", methods=["POST"])
 def add_rolls():
-    data = request.json
-    material = Material.query.filter_by(name=data["name"], type=data["type"]).first()
+    req = msgspec.json.decode(request.get_data(cache=False), type=AddRollsReq)
+    material = Material.query.filter_by(name=req.name, type=req.type).first()
 
     if not material:
         return jsonify({"error": "Material not found, please add it first using /api/materials"}), 404
 
-    roll_quantities = data["quantities"]  # List of roll quantities
-    roll_entries = [MaterialRoll(material_id=material.id, quantity=q) for q in roll_quantities]
+    roll_quantities = req.quantities  # List of roll quantities
+    material_id = material.id
+
+    # Insert all rolls with one executemany statement instead of one ORM object per roll,
+    # so the whole batch lands in a single transaction (one fsync on SQLite).
+    # An empty parameter list would compile to INSERT ... DEFAULT VALUES, so skip it.
+    if roll_quantities:
+        db.session.execute(
+            MaterialRoll.__table__.insert(),
+            [{"material_id": material.id, "quantity": q} for q in roll_quantities]
+        )
 
-    db.session.bulk_save_objects(roll_entries)
     db.session.commit()
 
     # Log Activity
-    log_activity("ADD", "material_rolls", material.id, {"added_rolls": roll_quantities})
-
-    return jsonify({"message": f"{len(roll_quantities)} rolls added successfully!", "material_id": material.id}), 201
+    log_activity("ADD", "material_rolls", material_id, {"added_rolls": roll_quantities})
+    invalidate_cache("materials_list")
+
+    return jsonify({"message": f"{len(roll_quantities)} rolls added successfully!", "material_id": material_id}), 201
+
+
+#  The whole response document is assembled by SQLite's JSON functions in C;
+#  the json() wrapper keeps the per-material roll arrays as JSON rather than
+#  escaped strings
+_MATERIALS_JSON_SQL = text("""
+    SELECT json_group_array(json_object(
+        'id', m.id,
+        'name', m.name,
+        'type', m.type,
+        'colour', m.colour,
+        'supplier', m.supplier,
+        'rolls', json((SELECT json_group_array(json_object(
+                           'id', r.id,
+                           'quantity', r.quantity,
+                           'date_added', strftime('%Y-%m-%dT%H:%M:%S', r.date_added)))
+                       FROM material_roll r WHERE r.material_id = m.id))
+    ))
+    FROM material m
+""")
 
 
 #  API to Retrieve All Materials with Rolls
 @app.route("/api/materials", methods=["GET"])
+@cache.cached(key_prefix="materials_list")
 def get_materials():
-    materials = Material.query.all()
-    results = []
-    for material in materials:
-        material_data = {
-            "id": material.id,
-            "name": material.name,
-            "type": material.type,
-            "colour": material.colour,
-            "supplier": material.supplier,
-            "rolls": [{"id": roll.id, "quantity": roll.quantity, "date_added": roll.date_added} for roll in
-                      material.rolls]
-        }
-        results.append(material_data)
-    return jsonify(results)
+    # SQLite hands back the finished JSON text, so no Python-side dict
+    # building or serialization happens at all
+    body = db.session.execute(_MATERIALS_JSON_SQL).scalar()
+    return app.response_class(body or "[]", mimetype="application/json")
 
 
 #  API to Retrieve a Single Material and Its Rolls
 @app.route("/api/material/<int:material_id>", methods=["GET"])
 def get_single_material(material_id):
-    material = Material.query.get(material_id)
+    material = Material.query.options(joinedload(Material.rolls)).get(material_id)
     if not material:
         return jsonify({"error": "Material not found"}), 404
 
@@ -176,13 +398,19 @@ def delete_material(material_id):
     if not material:
         return jsonify({"error": "Material not found"}), 404
 
-    # Delete all rolls associated with this material
-    MaterialRoll.query.filter_by(material_id=material.id).delete()
-
+    # Remove the children explicitly: databases created before the FK clauses
+    # existed have no ON DELETE behaviour baked in (SQLite cannot alter an
+    # existing FK), so the cascade cannot be relied on there. On new schemas
+    # these statements simply find nothing left for the cascade to do.
+    material_name = material.name
+    db.session.execute(delete(MaterialRoll).where(MaterialRoll.material_id == material_id))
+    db.session.execute(delete(Sale).where(Sale.material_id == material_id))
     db.session.delete(material)
+
     db.session.commit()
 
-    log_activity("DELETE", "materials", material_id, {"deleted_material": material.name})
+    log_activity("DELETE", "materials", material_id, {"deleted_material": material_name})
+    invalidate_cache("materials_list", "sales_list")  # sales go with the material
 
     return jsonify({"message": "Material and associated rolls deleted successfully"}), 200
 
@@ -190,16 +418,21 @@ def delete_material(material_id):
 #  API to Delete a Specific Roll Entry
 @app.route("/api/roll/<int:roll_id>", methods=["DELETE"])
 def delete_roll(roll_id):
-    roll = MaterialRoll.query.get(roll_id)
-    if not roll:
+    # DELETE ... RETURNING removes the row and hands back the fields for the
+    # log in one statement, instead of SELECT-then-DELETE
+    row = db.session.execute(
+        delete(MaterialRoll).where(MaterialRoll.id == roll_id)
+        .returning(MaterialRoll.material_id, MaterialRoll.quantity)
+    ).first()
+    if row is None:
         return jsonify({"error": "Roll not found"}), 404
 
-    deleted_data = {"material_id": roll.material_id, "quantity": roll.quantity}
+    deleted_data = {"material_id": row.material_id, "quantity": row.quantity}
 
-    db.session.delete(roll)
     db.session.commit()
 
     log_activity("DELETE", "material_rolls", roll_id, {"deleted_roll": deleted_data})
+    invalidate_cache("materials_list")
 
     return jsonify({"message": "Roll deleted successfully"}), 200
 
@@ -207,57 +440,69 @@ def delete_roll(roll_id):
 #  API to Update a Roll Quantity
 @app.route("/api/roll/<int:roll_id>", methods=["PUT"])
 def update_roll(roll_id):
-    data = request.json
+    req = msgspec.json.decode(request.get_data(cache=False), type=UpdateRollReq)
     roll = MaterialRoll.query.get(roll_id)
     if not roll:
         return jsonify({"error": "Roll not found"}), 404
 
     old_quantity = roll.quantity  # Save old value before updating
-    roll.quantity = data["quantity"]
+    roll.quantity = req.quantity
 
     db.session.commit()
 
     log_activity("UPDATE", "material_rolls", roll_id,
-                 {"before": {"quantity": old_quantity}, "after": {"quantity": roll.quantity}})
+                 {"before": {"quantity": old_quantity}, "after": {"quantity": req.quantity}})
+    invalidate_cache("materials_list")
 
     return jsonify({"message": "Roll updated successfully!"}), 200
 
 
 #  API to Get All Customers
 @app.route("/api/customers", methods=["GET"])
+@cache.cached(key_prefix="customers_list")
 def get_customers():
-    customers = Customer.query.all()
-    return jsonify([{"id": c.id, "name": c.name, "contact": c.contact, "debt": c.debt} for c in customers])
+    # Select plain column tuples - no ORM instance hydration per row
+    rows = db.session.execute(select(Customer.id, Customer.name, Customer.contact, Customer.debt)).all()
+    return jsonify([row._asdict() for row in rows])
 
 
 #  API to Add a New Customer
 @app.route("/api/customers", methods=["POST"])
 def add_customer():
-    data = request.json
-    new_customer = Customer(name=data["name"], contact=data["contact"], debt=0.0)
+    req = msgspec.json.decode(request.get_data(cache=False), type=AddCustomerReq)
+    new_customer = Customer(name=req.name, contact=req.contact, debt=0.0)
     db.session.add(new_customer)
+    db.session.flush()  # Assign the new id before committing
+    customer_id = new_customer.id
+
     db.session.commit()
 
-    log_activity("ADD", "customers", new_customer.id, {"name": data["name"], "contact": data["contact"]})
+    log_activity("ADD", "customers", customer_id, {"name": req.name, "contact": req.contact})
+    invalidate_cache("customers_list")
 
-    return jsonify({"message": "Customer added successfully!", "customer_id": new_customer.id}), 201
+    return jsonify({"message": "Customer added successfully!", "customer_id": customer_id}), 201
 
 
 #  API to Edit Customer Details
 @app.route("/api/customers/<int:customer_id>", methods=["PUT"])
 def edit_customer(customer_id):
-    data = request.json
+    req = msgspec.json.decode(request.get_data(cache=False), type=EditCustomerReq)
     customer = Customer.query.get(customer_id)
 
     if not customer:
         return jsonify({"error": "Customer not found"}), 404
 
     old_data = {"name": customer.name, "contact": customer.contact, "debt": customer.debt}
-    customer.name = data.get("name", customer.name)
-    customer.contact = data.get("contact", customer.contact)
+    if req.name is not None:
+        customer.name = req.name
+    if req.contact is not None:
+        customer.contact = req.contact
+
+    new_data = {"name": customer.name, "contact": customer.contact}
     db.session.commit()
 
-    log_activity("UPDATE", "customers", customer.id, {"before": old_data, "after": data})
+    log_activity("UPDATE", "customers", customer_id, {"before": old_data, "after": new_data})
+    invalidate_cache("customers_list", "sales_list")  # sales embed the customer name
 
     return jsonify({"message": "Customer updated successfully!"})
 
@@ -265,15 +510,25 @@ def edit_customer(customer_id):
 #  API to Delete a Customer
 @app.route("/api/customers/<int:customer_id>", methods=["DELETE"])
 def delete_customer(customer_id):
-    customer = Customer.query.get(customer_id)
-    if not customer:
+    # Detach the customer's sales explicitly rather than relying on the FK's
+    # SET NULL, which pre-existing databases don't have (SQLite cannot alter
+    # an existing FK); get_sales renders the NULL as "Walk-in Customer"
+    db.session.execute(update(Sale).where(Sale.customer_id == customer_id).values(customer_id=None))
+
+    # Single DELETE ... RETURNING instead of SELECT-then-DELETE
+    row = db.session.execute(
+        delete(Customer).where(Customer.id == customer_id)
+        .returning(Customer.name, Customer.contact)
+    ).first()
+    if row is None:
         return jsonify({"error": "Customer not found"}), 404
 
-    deleted_data = {"name": customer.name, "contact": customer.contact}
-    db.session.delete(customer)
+    deleted_data = {"name": row.name, "contact": row.contact}
+
     db.session.commit()
 
     log_activity("DELETE", "customers", customer_id, {"deleted_customer": deleted_data})
+    invalidate_cache("customers_list", "sales_list")
 
     return jsonify({"message": "Customer deleted successfully!"})
 
@@ -281,67 +536,97 @@ def delete_customer(customer_id):
 #  API to Record a Sale & Update Stock
 @app.route("/api/sales", methods=["POST"])
 def add_sale():
-    data = request.json
-    material = Material.query.get(data["material_id"])
-    customer = Customer.query.get(data["customer_id"])
+    req = msgspec.json.decode(request.get_data(cache=False), type=AddSaleReq)
 
-    if not material:
+    # Stock itself is deducted by the AFTER INSERT trigger in the same
+    # transaction as the sale row, and the BEFORE INSERT guard is what
+    # actually enforces sufficient stock; this SELECT only drives the 404
+    # and the fast-path 400
+    stock = db.session.execute(
+        select(Material.total_quantity).where(Material.id == req.material_id)
+    ).scalar()
+
+    if stock is None:
         return jsonify({"error": "Material not found"}), 404
 
-    if material.total_quantity < data["quantity_sold"]:
+    if stock < req.quantity_sold:
         return jsonify({"error": "Insufficient stock"}), 400
 
-    # Deduct the quantity from total stock
-    material.total_quantity -= data["quantity_sold"]
+    # Validate the customer up front: with FK enforcement on, a dangling
+    # customer_id would otherwise abort the insert with a constraint error
+    customer = None
+    if req.customer_id is not None:
+        customer = Customer.query.get(req.customer_id)
+        if customer is None:
+            return jsonify({"error": "Customer not found"}), 404
 
     # Add sale record
     new_sale = Sale(
-        material_id=data["material_id"],
-        customer_id=data["customer_id"],
-        quantity_sold=data["quantity_sold"],
-        price=data["price"],
-        date=datetime.utcnow()
+        material_id=req.material_id,
+        customer_id=req.customer_id,
+        quantity_sold=req.quantity_sold,
+        price=req.price
     )
     db.session.add(new_sale)
 
     # If customer has debt, update it
-    if customer and "amount_due" in data:
-        customer.debt += data["amount_due"]  # Add pending payment
-
+    if customer is not None and req.amount_due is not None:
+        customer.debt += req.amount_due  # Add pending payment
+
+    try:
+        db.session.flush()  # Assign the new id before committing
+    except IntegrityError as exc:
+        # A concurrent sale won the race since the pre-check; the guard
+        # trigger aborted this insert before stock could go negative
+        db.session.rollback()
+        if "insufficient stock" in str(exc.orig):
+            return jsonify({"error": "Insufficient stock"}), 400
+        raise
+
+    sale_id = new_sale.id
     db.session.commit()
 
     # Log Activity
-    log_activity("SALE", "sales", new_sale.id, {
-        "material_id": data["material_id"],
-        "customer_id": data["customer_id"],
-        "quantity_sold": data["quantity_sold"],
-        "price": data["price"]
+    log_activity("SALE", "sales", sale_id, {
+        "material_id": req.material_id,
+        "customer_id": req.customer_id,
+        "quantity_sold": req.quantity_sold,
+        "price": req.price
     })
+    invalidate_cache("sales_list", "customers_list")  # debt may have changed
 
     return jsonify({"message": "Sale recorded successfully!"})
 
 
 #  API to Get All Sales
 @app.route("/api/sales", methods=["GET"])
+@cache.cached(key_prefix="sales_list")
 def get_sales():
-    sales = Sale.query.all()
+    # One joined Core query projecting only the response columns - no ORM
+    # instances and no per-sale lazy loads for the material/customer names
+    rows = db.session.execute(
+        select(Sale.id, Sale.quantity_sold, Sale.price, Sale.date,
+               Material.name.label("material"), Customer.name.label("customer"))
+        .join(Material, Sale.material_id == Material.id)
+        .outerjoin(Customer, Sale.customer_id == Customer.id)
+    ).all()
     return jsonify([
         {
-            "id": s.id,
-            "material": s.material.name,
-            "customer": s.customer.name if s.customer else "Walk-in Customer",
-            "quantity_sold": s.quantity_sold,
-            "price": s.price,
-            "date": s.date
+            "id": row.id,
+            "material": row.material,
+            "customer": row.customer if row.customer is not None else "Walk-in Customer",
+            "quantity_sold": row.quantity_sold,
+            "price": row.price,
+            "date": row.date
         }
-        for s in sales
+        for row in rows
     ])
 
 
 #  API to Edit a Sale
 @app.route("/api/sales/<int:sale_id>", methods=["PUT"])
 def edit_sale(sale_id):
-    data = request.json
+    req = msgspec.json.decode(request.get_data(cache=False), type=EditSaleReq)
     sale = Sale.query.get(sale_id)
 
     if not sale:
@@ -349,17 +634,18 @@ def edit_sale(sale_id):
 
     old_data = {"quantity_sold": sale.quantity_sold, "price": sale.price}
 
-    old_quantity = sale.quantity_sold  # Store old quantity for stock adjustment
-    sale.quantity_sold = data.get("quantity_sold", sale.quantity_sold)
-    sale.price = data.get("price", sale.price)
+    if req.quantity_sold is not None:
+        sale.quantity_sold = req.quantity_sold
+    if req.price is not None:
+        sale.price = req.price
 
-    # Adjust stock levels
-    sale.material.total_quantity += old_quantity  # Revert old quantity
-    sale.material.total_quantity -= sale.quantity_sold  # Deduct new quantity
+    # Stock is rebalanced by the AFTER UPDATE trigger on sale
 
+    new_data = {"quantity_sold": sale.quantity_sold, "price": sale.price}
     db.session.commit()
 
-    log_activity("UPDATE", "sales", sale.id, {"before": old_data, "after": data})
+    log_activity("UPDATE", "sales", sale_id, {"before": old_data, "after": new_data})
+    invalidate_cache("sales_list")
 
     return jsonify({"message": "Sale updated successfully!"})
 
@@ -367,37 +653,51 @@ def edit_sale(sale_id):
 #  API to Delete a Sale & Restore Stock
 @app.route("/api/sales/<int:sale_id>", methods=["DELETE"])
 def delete_sale(sale_id):
-    sale = Sale.query.get(sale_id)
-    if not sale:
+    # Single DELETE ... RETURNING instead of SELECT-then-DELETE; stock is
+    # restored by the AFTER DELETE trigger on sale
+    row = db.session.execute(
+        delete(Sale).where(Sale.id == sale_id)
+        .returning(Sale.material_id, Sale.customer_id, Sale.quantity_sold, Sale.price, Sale.date)
+    ).first()
+    if row is None:
         return jsonify({"error": "Sale not found"}), 404
 
     deleted_data = {
-        "material_id": sale.material_id,
-        "customer_id": sale.customer_id,
-        "quantity_sold": sale.quantity_sold,
-        "price": sale.price,
-        "date": sale.date
+        "material_id": row.material_id,
+        "customer_id": row.customer_id,
+        "quantity_sold": row.quantity_sold,
+        "price": row.price,
+        "date": row.date
     }
 
-    sale.material.total_quantity += sale.quantity_sold
-    db.session.delete(sale)
     db.session.commit()
 
     log_activity("DELETE", "sales", sale_id, {"deleted_sale": deleted_data})
+    invalidate_cache("sales_list")
 
     return jsonify({"message": "Sale deleted and stock restored!"})
 
 
 @app.route("/api/logs", methods=["GET"])
+@cache.cached(query_string=True)  # one entry per (limit, offset); expires via TTL
 def get_logs():
-    logs = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).all()
+    # Paginate so memory and CPU per request stay bounded as the log grows;
+    # non-numeric params fall back to the defaults and negatives are clamped
+    # (SQLite reads LIMIT -1 as unbounded)
+    limit = min(max(request.args.get("limit", 100, type=int), 0), 1000)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    logs = db.session.execute(
+        select(ActivityLog.id, ActivityLog.action_type, ActivityLog.table_name,
+               ActivityLog.record_id, ActivityLog.changes, ActivityLog.timestamp)
+        .order_by(ActivityLog.timestamp.desc()).limit(limit).offset(offset)
+    ).all()
     return jsonify([
         {
             "id": log.id,
             "action_type": log.action_type,
             "table_name": log.table_name,
             "record_id": log.record_id,
-            "changes": json.loads(log.changes),
+            "changes": orjson.loads(log.changes),
             "timestamp": log.timestamp
         }
         for log in logs
@@ -405,4 +705,6 @@ def get_logs():
 
 if __name__ == "__main__":
     db.create_all()
-    app.run(debug=True)
+    # threaded=True lets requests overlap their DB and socket I/O; WAL mode
+    # keeps readers from blocking behind the writer
+    app.run(debug=True, threaded=True)